@@ -1,26 +1,82 @@
+import asyncio
+import contextlib
 import threading
 import time
 import re
 import csv
+import functools
+import html
+import json
+import os
+import queue
+import shutil
 import urllib.parse
 from dataclasses import dataclass
 from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # backend asyncio é opcional
+    aiohttp = None
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx só faz HTTP/2 com o pacote h2)
+except ImportError:  # backend HTTP/2 é opcional
+    httpx = None
+
+# backends de download disponíveis (ordem = preferência)
+BACKENDS = [name for name, mod in (("aiohttp", aiohttp), ("httpx", httpx)) if mod is not None]
+BACKENDS.append("threads")
 
 
 PDF_HREF_RE = re.compile(
     r"https?://static\.even3\.com/anais/\d+\.pdf(\?[^\"'>\s]+)?", re.I)
+# mesma regex sobre bytes: varre a resposta sem decodificar
+PDF_HREF_BRE = re.compile(PDF_HREF_RE.pattern.encode("ascii"), re.I)
+_BAD_CHARS_TABLE = str.maketrans({c: "_" for c in '\\/*?"<>|:'})
+_WS = re.compile(r"\s+")
+_TITLE_SPLIT = re.compile(r"(\d{3,})[-/](.+)$")
+_WORK_ID = re.compile(r"/anais/[^/]+/(\d{3,})", re.I)
+_HREF = re.compile(r"""href\s*=\s*["']([^"'#]+)""", re.I)
+# aceita '#' porque o href pode vir com entidades HTML (&#x2F;)
+_HREF_B = re.compile(rb"""href\s*=\s*["']([^"']+)""", re.I)
+
+# o link do PDF fica no <head>/começo do body; não precisa do resto da página
+WORK_PAGE_MAX_BYTES = 256 * 1024
+# sobreposição entre chunks pra não perder o início de um link cortado no meio
+PDF_SCAN_OVERLAP = 200
+
+# modo Auto: teto de downloads em voo e cache do valor calibrado por host
+TUNE_MAX_INFLIGHT = 64
+# linhas do manifest.csv acumuladas antes de cada escrita
+MANIFEST_BATCH = 64
+TUNE_CACHE = Path.home() / ".even3_downloader_tune.json"
+# valor calibrado vence depois disso (a rede muda); recalibra na próxima vez
+TUNE_MAX_AGE = 7 * 24 * 3600
+PDF_HOST = "static.even3.com"
+
+# mesma política de retry nos backends sync (urllib3) e async
+RETRY_TOTAL = 4
+RETRY_BACKOFF = 0.3
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121 Safari/537.36",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
 
 
 @dataclass
@@ -50,24 +106,19 @@ def extract_slug(anais_url: str) -> str:
         "URL inválida. Ex: https://www.even3.com.br/anais/ennepe2022/")
 
 
+@functools.lru_cache(maxsize=4096)
 def safe_filename(s: str, max_len: int = 140) -> str:
-    s = re.sub(r"[\\/*?\"<>|:]+", "_", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    if not s:
-        s = "arquivo"
-    if len(s) > max_len:
-        s = s[:max_len].rstrip()
-    return s
+    s = s.translate(_BAD_CHARS_TABLE)
+    s = _WS.sub(" ", s).strip() or "arquivo"
+    return s[:max_len].rstrip()
 
 
-def guess_title_from_work_url(work_url: str) -> str:
+def _title_from_segment(last: str) -> str:
     """
     Usa o pedaço depois do ID na própria URL pra criar um título sem precisar abrir a página.
-    Ex: .../528929-ELES-NAO-TEM... -> "ELES NAO TEM ... "
+    Ex: "528929-ELES-NAO-TEM..." -> "ELES NAO TEM ... "
     """
-    path = urlparse(work_url).path.strip("/")
-    last = path.split("/")[-1]  # "528929-AAA-BBB"
-    m = re.match(r"(\d{3,})[-/](.+)$", last)
+    m = _TITLE_SPLIT.match(last)
     if not m:
         return ""
     raw = m.group(2)
@@ -75,28 +126,114 @@ def guess_title_from_work_url(work_url: str) -> str:
     # limpa hifens e duplos
     raw = raw.replace("--", " - ")
     raw = raw.replace("-", " ")
-    raw = re.sub(r"\s+", " ", raw).strip()
+    raw = _WS.sub(" ", raw).strip()
     return raw
 
 
-def collect_work_urls_with_playwright(anais_url: str, slug: str, log_fn, progress_fn) -> list[str]:
-    work_url_re = re.compile(
+@functools.lru_cache(maxsize=32)
+def _compile_slug_re(slug: str) -> re.Pattern:
+    return re.compile(
         rf"^https?://www\.even3\.com\.br/anais/{re.escape(slug)}/\d{{3,}}", re.I)
+
+
+def collect_work_urls_http(session: requests.Session, anais_url: str, slug: str, progress_fn,
+                           batch: int = 8, max_pages: int = 500) -> list[str]:
+    """
+    Coleta os links direto do HTML server-side (?page=N), sem abrir navegador.
+    Busca `batch` páginas em paralelo e para quando um lote não traz link novo.
+    Retorna [] (-> fallback pro navegador) se o servidor ignora ?page (pág 2
+    repete a pág 1) ou se algum request falha. Pág 2 vazia/404 = anais de uma
+    página só.
+    """
+    work_url_re = _compile_slug_re(slug)
+
+    def fetch_page(page: int) -> set[str] | None:
+        try:
+            r = session.get(anais_url, params={"page": page}, timeout=60)
+        except requests.RequestException:
+            return None
+        if r.status_code != 200:
+            return set()
+        found = set()
+        for h in _HREF.findall(r.text):
+            h = urllib.parse.urljoin(r.url, h.strip())
+            if work_url_re.match(h):
+                found.add(h.split("?")[0])
+        return found
+
+    with ThreadPoolExecutor(max_workers=batch) as ex:
+        page1, page2 = ex.map(fetch_page, (1, 2))
+        if not page1 or page2 is None:
+            return []
+        if not page2:
+            progress_fn(f"Coletando links… pág 1, total {len(page1)}")
+            return sorted(page1)
+        # paginação via JS: o servidor devolve a pág 1 pra qualquer ?page
+        if page2 <= page1:
+            return []
+        collected = page1 | page2
+        progress_fn(f"Coletando links… pág 2, total {len(collected)}")
+
+        for first in range(3, max_pages + 1, batch):
+            pages = range(first, min(first + batch, max_pages + 1))
+            results = list(ex.map(fetch_page, pages))
+            if any(found is None for found in results):
+                return []
+            new_here = 0
+            for found in results:
+                new_here += len(found - collected)
+                collected |= found
+            progress_fn(
+                f"Coletando links… pág {pages[-1]} (+{new_here}), total {len(collected)}")
+            if new_here == 0:
+                break
+
+    return sorted(collected)
+
+
+# primeiro link de trabalho da página (mesma regex de _compile_slug_re, via JS)
+_FIRST_WORK_HREF_JS = """([sel, src]) => {
+    const re = new RegExp(src, "i");
+    const a = Array.from(document.querySelectorAll(sel)).find(a => re.test(a.href));
+    return a ? a.href : "";
+}"""
+
+
+def collect_work_urls_with_playwright(browser, anais_url: str, slug: str, log_fn, progress_fn, is_running) -> list[str]:
+    """
+    Usa um browser já aberto (reaproveitado entre execuções); cada coleta roda
+    num contexto novo, fechado no fim. Para de paginar quando is_running() cai.
+    """
+    work_url_re = _compile_slug_re(slug)
     collected = set()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            )
+    context = browser.new_context(
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/121.0.0.0 Safari/537.36"
         )
+    )
+    try:
+        page = context.new_page()
+
+        # espera por evento no DOM em vez de networkidle + sleeps fixos;
+        # o seletor só pré-filtra, quem decide é work_url_re (/slug/\d{3,})
+        work_arg = [f'a[href*="/anais/{slug}/" i]', work_url_re.pattern]
 
         log_fn("Abrindo página do anais…")
-        page.goto(anais_url, wait_until="networkidle", timeout=90_000)
-        page.wait_for_timeout(1000)
+        page.goto(anais_url, wait_until="domcontentloaded", timeout=90_000)
+        try:
+            page.wait_for_function(
+                f"arg => ({_FIRST_WORK_HREF_JS})(arg) !== ''", arg=work_arg, timeout=30_000)
+        except PlaywrightTimeoutError:
+            pass
+
+        def first_work_href() -> str:
+            try:
+                return page.evaluate(_FIRST_WORK_HREF_JS, work_arg) or ""
+            except Exception:
+                return ""
 
         def scrape_links():
             try:
@@ -113,7 +250,7 @@ def collect_work_urls_with_playwright(anais_url: str, slug: str, log_fn, progres
                         new_count += 1
             return new_count
 
-        def click_next() -> bool:
+        def click_next(wait_ms: int) -> bool:
             candidates = [
                 'a:has-text("Próximo")',
                 'button:has-text("Próximo")',
@@ -122,6 +259,7 @@ def collect_work_urls_with_playwright(anais_url: str, slug: str, log_fn, progres
             ]
             for sel in candidates:
                 loc = page.locator(sel).first
+                clicked = False
                 try:
                     if loc.count() == 0 or not loc.is_visible():
                         continue
@@ -131,20 +269,25 @@ def collect_work_urls_with_playwright(anais_url: str, slug: str, log_fn, progres
                     if aria_disabled == "true" or "disabled" in cls:
                         return False
 
+                    prev = first_work_href()
                     loc.click(timeout=5_000)
-                    page.wait_for_load_state("networkidle", timeout=30_000)
-                    page.wait_for_timeout(700)
+                    clicked = True
+                    page.wait_for_function(
+                        f"([arg, prev]) => ({_FIRST_WORK_HREF_JS})(arg) !== prev",
+                        arg=[work_arg, prev], timeout=wait_ms)
                     return True
-                except PlaywrightTimeoutError:
-                    continue
                 except Exception:
+                    # já clicou: não tenta outro "próximo" (avançaria duas
+                    # vezes); segue só se a lista de fato mudou
+                    if clicked:
+                        return first_work_href() != prev
                     continue
             return False
 
         page_idx = 1
         stalled = 0
 
-        while True:
+        while is_running():
             new_here = scrape_links()
             progress_fn(
                 f"Coletando links… pág {page_idx} (+{new_here}), total {len(collected)}")
@@ -154,69 +297,165 @@ def collect_work_urls_with_playwright(anais_url: str, slug: str, log_fn, progres
                 stalled = 0
             if stalled >= 5:
                 break
-            if not click_next():
+            # depois de uma página sem novidade, espera menos pela próxima
+            if not click_next(15_000 if stalled == 0 else 5_000):
                 break
             page_idx += 1
-
-        browser.close()
+    finally:
+        context.close()
 
     return sorted(collected)
 
 
-def make_session(pool_size: int) -> requests.Session:
+def make_session(workers: int) -> requests.Session:
+    """
+    Uma Session só, compartilhada por todas as threads (get/head são thread-safe).
+    """
     s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121 Safari/537.36",
-        "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-    })
-    adapter = HTTPAdapter(pool_connections=pool_size,
-                          pool_maxsize=pool_size, max_retries=2)
+    s.headers.update(HTTP_HEADERS)
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,  # quem chama decide pelo status_code
+    )
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers * 4,
+                          max_retries=retry, pool_block=False)
     s.mount("http://", adapter)
     s.mount("https://", adapter)
     return s
 
 
-_thread_local = threading.local()
+class PdfScanner:
+    """
+    Acumula os chunks em buf e procura o link só na parte nova (+ sobreposição).
+    Um match encostado no fim do buffer pode estar incompleto (query cortada),
+    então guarda onde ele começa e retoma dali no próximo chunk, seja qual for
+    o tamanho da query.
+    """
 
+    def __init__(self):
+        self.buf = bytearray()
+        self._pending = None
+
+    def feed(self, chunk: bytes) -> str | None:
+        if self._pending is not None:
+            start = self._pending
+        else:
+            start = max(0, len(self.buf) - PDF_SCAN_OVERLAP)
+        self.buf += chunk
+        m = PDF_HREF_BRE.search(self.buf, start)
+        self._pending = None
+        if not m:
+            return None
+        # "...pdf?" no fim ainda pode ganhar a query no próximo chunk
+        if m.end() == len(self.buf) or self.buf[m.end()] == ord("?"):
+            self._pending = m.start()
+            return None
+        return m.group(0).decode("utf-8", "ignore")
+
+
+def find_pdf_url_in_html(page: bytes) -> str | None:
+    m = PDF_HREF_BRE.search(page)
+    if m:
+        return m.group(0).decode("utf-8", "ignore")
 
-def get_thread_session(pool_size: int) -> requests.Session:
-    if not hasattr(_thread_local, "session"):
-        _thread_local.session = make_session(pool_size)
-    return _thread_local.session
+    # fallback sem parser HTML: todos os href, com entidades (&#x2F; etc.) resolvidas
+    for raw in _HREF_B.findall(page):
+        href = html.unescape(raw.decode("utf-8", "ignore")).strip()
+        if PDF_HREF_RE.match(href):
+            return href
+    return None
 
 
 def parse_work_page_for_pdf(session: requests.Session, work_url: str) -> str | None:
-    r = session.get(work_url, timeout=60)
-    if r.status_code != 200:
+    with session.get(work_url, stream=True, timeout=60) as r:
+        if r.status_code != 200:
+            return None
+        scanner = PdfScanner()
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            pdf_url = scanner.feed(chunk)
+            if pdf_url:
+                return pdf_url
+            if len(scanner.buf) >= WORK_PAGE_MAX_BYTES:
+                break
+    return find_pdf_url_in_html(bytes(scanner.buf))
+
+
+def looks_like_pdf(status: int, headers, min_size: int = 1024) -> bool:
+    ctype = headers.get("Content-Type", "").lower()
+    if status == 206:
+        # Content-Range: bytes 0-0/123456
+        total = headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        total = headers.get("Content-Length", "0")
+    try:
+        size = int(total)
+    except ValueError:
+        return False
+    return status in (200, 206) and ctype.startswith("application/pdf") and size > min_size
+
+
+# HEAD bloqueado/não implementado -> tenta um GET de 1 byte
+HEAD_BLOCKED = (403, 405, 501)
+
+
+def probe_direct_pdf(session: requests.Session, pdf_url: str) -> bool:
+    """
+    Confere se o PDF direto existe sem baixar o corpo (evita baixar a página
+    de erro inteira quando o ID.pdf não existe).
+    """
+    r = session.head(pdf_url, timeout=10, allow_redirects=True)
+    if r.status_code not in HEAD_BLOCKED:
+        return looks_like_pdf(r.status_code, r.headers)
+
+    with session.get(pdf_url, headers={"Range": "bytes=0-0"}, stream=True,
+                     timeout=10, allow_redirects=True) as r:
+        return looks_like_pdf(r.status_code, r.headers)
+
+
+def meta_path(pdf_path: Path) -> Path:
+    return pdf_path.with_suffix(pdf_path.suffix + ".meta")
+
+
+def read_meta(pdf_path: Path) -> dict | None:
+    try:
+        return json.loads(meta_path(pdf_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
         return None
-    html = r.text
-    m = PDF_HREF_RE.search(html)
-    if m:
-        return m.group(0)
 
-    soup = BeautifulSoup(html, "html.parser")
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if PDF_HREF_RE.match(href):
-            return href
-    return None
 
+def write_meta(pdf_path: Path, pdf_url: str, headers) -> None:
+    """
+    Guarda ETag/Last-Modified do servidor num <arquivo>.pdf.meta ao lado do PDF,
+    pra revalidar com GET condicional na próxima execução. Sem nenhum dos dois
+    não há o que revalidar: remove um .meta antigo, se houver.
+    """
+    data = {
+        "url": pdf_url,
+        "etag": headers.get("ETag", ""),
+        "last_modified": headers.get("Last-Modified", ""),
+    }
+    try:
+        if not conditional_headers(data):
+            meta_path(pdf_path).unlink(missing_ok=True)
+            return
+        meta_path(pdf_path).write_text(json.dumps(data), encoding="utf-8")
+    except OSError:
+        pass
 
-def download_pdf(session: requests.Session, pdf_url: str, out_path: Path, delay: float) -> None:
-    if delay > 0:
-        time.sleep(delay)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = out_path.with_suffix(out_path.suffix + ".part")
+def conditional_headers(meta: dict) -> dict:
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
 
-    with session.get(pdf_url, stream=True, timeout=120, allow_redirects=True) as r:
-        r.raise_for_status()
-        with open(tmp, "wb") as f:
-            # chunk maior = menos overhead
-            for chunk in r.iter_content(chunk_size=1024 * 512):
-                if chunk:
-                    f.write(chunk)
 
+def finish_part_file(tmp: Path, out_path: Path) -> None:
     if tmp.stat().st_size < 1024:
         tmp.unlink(missing_ok=True)
         raise RuntimeError("Arquivo muito pequeno (provável erro/HTML).")
@@ -224,40 +463,126 @@ def download_pdf(session: requests.Session, pdf_url: str, out_path: Path, delay:
     tmp.replace(out_path)
 
 
-def work_id_from_url(work_url: str) -> str:
-    m = re.search(r"/anais/[^/]+/(\d{3,})", work_url, re.I)
-    return m.group(1) if m else ""
+def download_pdf(session: requests.Session, pdf_url: str, out_path: Path, delay: float,
+                 validators: dict | None = None) -> bool:
+    """
+    Baixa pdf_url em out_path. Com `validators` (If-None-Match/If-Modified-Since)
+    retorna False sem tocar no arquivo quando o servidor responde 304.
+    """
+    if delay > 0:
+        time.sleep(delay)
 
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(out_path.suffix + ".part")
 
-def job_download(work_url: str, out_dir: Path, pool_size: int, delay: float) -> tuple[str, str, str, str, str]:
+    with session.get(pdf_url, headers=validators, stream=True, timeout=120, allow_redirects=True) as r:
+        if r.status_code == 304:
+            return False
+        r.raise_for_status()
+        resp_headers = r.headers
+        try:
+            total = int(r.headers.get("Content-Length", "0"))
+        except ValueError:
+            total = 0
+
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT |
+                     os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+        with os.fdopen(fd, "wb", buffering=0) as f:
+            # reserva o espaço de uma vez (menos fragmentação); só Linux/Unix
+            if total and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, total)
+                except OSError:
+                    pass
+            # cópia em C, 1 MB por vez, sem loop Python por chunk
+            r.raw.decode_content = True
+            shutil.copyfileobj(r.raw, f, 1024 * 1024)
+            # com gzip o tamanho final difere do Content-Length reservado
+            f.truncate(f.tell())
+
+    finish_part_file(tmp, out_path)
+    write_meta(out_path, pdf_url, resp_headers)
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_work_url(work_url: str) -> tuple[str, str]:
     """
-    Retorna: (work_url, work_id, pdf_url, file_path, status)
+    (work_id, título) com um único urlparse.
+    Ex: .../anais/ennepe2022/528929-ELES-NAO-TEM -> ("528929", "ELES NAO TEM")
     """
-    session = get_thread_session(pool_size)
+    path = urlparse(work_url).path
+    m = _WORK_ID.search(path)
+    wid = m.group(1) if m else ""
+    return wid, _title_from_segment(path.strip("/").split("/")[-1])
 
-    wid = work_id_from_url(work_url)
-    title = guess_title_from_work_url(work_url)
+
+def work_filename(wid: str, title: str) -> str:
     base = wid if wid else "trabalho"
     if title:
         base = f"{base} - {title}"
-    filename = safe_filename(base) + ".pdf"
-    file_path = out_dir / filename
+    return safe_filename(base) + ".pdf"
+
 
-    if file_path.exists() and file_path.stat().st_size > 0:
-        return (work_url, wid, "", str(file_path), "exists")
+def plan_jobs(work_urls: list[str], out_dir: Path, revalidate: bool = False) -> tuple[list[tuple[str, str, Path]], list[tuple[str, str, str, str, str]]]:
+    """
+    Pré-passo na thread principal (só string/stat, sem rede): monta
+    (work_url, work_id, file_path) de cada trabalho, já separando o que está
+    baixado. Retorna (pendentes, linhas "exists" pro manifest).
+    Com revalidate, PDFs cujo .meta tem ETag/Last-Modified voltam pra fila pra
+    um GET condicional.
+    """
+    names = {p.name for p in out_dir.iterdir()}
+    existing = {n for n in names if n.endswith(".pdf")}
+    with_meta = {n[:-len(".meta")] for n in names if n.endswith(".pdf.meta")} if revalidate else set()
+    pending = []
+    skipped = []
+    for work_url in dict.fromkeys(work_urls):
+        wid, title = parse_work_url(work_url)
+        filename = work_filename(wid, title)
+        file_path = out_dir / filename
+        revalidatable = filename in with_meta and bool(
+            conditional_headers(read_meta(file_path) or {}))
+        if filename in existing and not revalidatable and file_path.stat().st_size > 1024:
+            skipped.append((work_url, wid, "", str(file_path), "exists"))
+        else:
+            pending.append((work_url, wid, file_path))
+    return pending, skipped
+
+
+def job_download(session: requests.Session, work_url: str, wid: str, file_path: Path, delay: float) -> tuple[str, str, str, str, str]:
+    """
+    Só HTTP + disco; work_id/file_path já vêm prontos de plan_jobs.
+    Retorna: (work_url, work_id, pdf_url, file_path, status)
+    """
+    # 0) já baixado e com .meta: GET condicional (304 = não mudou)
+    meta = read_meta(file_path) if file_path.exists() else None
+    if meta and meta.get("url") and conditional_headers(meta):
+        try:
+            if download_pdf(session, meta["url"], file_path, delay=delay,
+                            validators=conditional_headers(meta)):
+                return (work_url, wid, meta["url"], str(file_path), "downloaded_updated")
+            return (work_url, wid, meta["url"], str(file_path), "exists")
+        except Exception:
+            # segue o fluxo normal
+            pass
 
     # 1) tentativa rápida: baixar direto por ID.pdf
     direct_pdf = f"https://static.even3.com/anais/{wid}.pdf" if wid else ""
     if direct_pdf:
         try:
-            download_pdf(session, direct_pdf, file_path, delay=delay)
-            return (work_url, wid, direct_pdf, str(file_path), "downloaded_direct")
+            if probe_direct_pdf(session, direct_pdf):
+                download_pdf(session, direct_pdf, file_path, delay=delay)
+                return (work_url, wid, direct_pdf, str(file_path), "downloaded_direct")
         except Exception:
             # fallback abaixo
             pass
 
     # 2) fallback: abre página do trabalho e pega o PDF “real”
-    pdf_url = parse_work_page_for_pdf(session, work_url)
+    try:
+        pdf_url = parse_work_page_for_pdf(session, work_url)
+    except Exception:
+        return (work_url, wid, "", "", "error")
     if not pdf_url:
         return (work_url, wid, "", "", "no_pdf")
 
@@ -268,6 +593,321 @@ def job_download(work_url: str, out_dir: Path, pool_size: int, delay: float) ->
         return (work_url, wid, pdf_url, "", "error")
 
 
+class ConcurrencyTuner:
+    """
+    Calibra quantos downloads ficam em voo: dobra o limite a cada `interval` s
+    enquanto o MB/s agregado sobe mais de 10%; quando estabiliza (ou estoura
+    `budget` s, depois de medir pelo menos duas janelas) volta pro melhor valor
+    e congela. O relógio só conta a partir de start(), chamado quando os
+    downloads começam (a coleta de links não entra na medida).
+    """
+
+    def __init__(self, start: int = 4, max_limit: int = TUNE_MAX_INFLIGHT,
+                 interval: float = 5.0, budget: float = 30.0, gain: float = 1.10):
+        self.limit = start
+        self.max_limit = max_limit
+        self.interval = interval
+        self.budget = budget
+        self.gain = gain
+        self.done = False
+        self._best_rate = 0.0
+        self._best_limit = start
+        self._windows = 0
+        self.start()
+
+    def start(self) -> None:
+        self._bytes = 0
+        self._t0 = self._window_t0 = time.monotonic()
+
+    @property
+    def converged(self) -> bool:
+        # só vale salvar o que foi comparado com pelo menos outra janela
+        return self.done and self._windows >= 2
+
+    def add_bytes(self, n: int) -> None:
+        if self.done:
+            return
+        self._bytes += n
+        now = time.monotonic()
+        elapsed = now - self._window_t0
+        if elapsed < self.interval:
+            return
+
+        rate = self._bytes / elapsed
+        self._windows += 1
+        if rate > self._best_rate * self.gain and self.limit < self.max_limit:
+            self._best_rate = rate
+            self._best_limit = self.limit
+            self.limit = min(self.limit * 2, self.max_limit)
+        else:
+            if rate > self._best_rate:
+                self._best_limit = self.limit
+            self.limit = self._best_limit
+            self.done = True
+        if now - self._t0 >= self.budget and not self.done and self._windows >= 2:
+            self.limit = self._best_limit
+            self.done = True
+        self._bytes = 0
+        self._window_t0 = now
+
+
+def _read_tune_cache() -> dict:
+    try:
+        data = json.loads(TUNE_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_tune_cache(data: dict) -> None:
+    try:
+        TUNE_CACHE.write_text(json.dumps(data), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def load_tuned_workers(host: str = PDF_HOST) -> int | None:
+    """
+    Valor calibrado pro host, ou None se não há, é de outro formato ou passou
+    de TUNE_MAX_AGE.
+    """
+    try:
+        entry = _read_tune_cache()[host]
+        if time.time() - float(entry["ts"]) > TUNE_MAX_AGE:
+            return None
+        return int(entry["workers"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def save_tuned_workers(value: int, host: str = PDF_HOST) -> None:
+    data = _read_tune_cache()
+    data[host] = {"workers": value, "ts": time.time()}
+    _write_tune_cache(data)
+
+
+def forget_tuned_workers(host: str = PDF_HOST) -> None:
+    data = _read_tune_cache()
+    if data.pop(host, None) is not None:
+        _write_tune_cache(data)
+
+
+def download_all_threaded(session: requests.Session, jobs: list[tuple[str, str, Path]],
+                          max_threads: int, limit_fn, delay: float, on_result, is_running) -> None:
+    """
+    Submete aos poucos, mantendo no máximo limit_fn() futures pendentes (o
+    limite pode mudar no meio do caminho, ex. modo Auto). Memória fica constante
+    em N e um Parar não precisa esvaziar uma fila com todos os jobs.
+    """
+    pending = iter(jobs)
+    inflight = set()
+    ex = ThreadPoolExecutor(max_workers=max_threads)
+    try:
+        exhausted = False
+        while is_running():
+            while not exhausted and len(inflight) < limit_fn():
+                nxt = next(pending, None)
+                if nxt is None:
+                    exhausted = True
+                    break
+                inflight.add(ex.submit(job_download, session, *nxt, delay))
+            if not inflight:
+                break
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if not is_running():
+                    break
+                on_result(fut.result())
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+# --- backends asyncio (aiohttp ou httpx/HTTP/2): uma thread, centenas de requests em voo ---
+
+def make_async_client(backend: str, max_inflight: int):
+    """
+    Pool dimensionado pro máximo de tasks em voo, pra nenhuma ficar esperando
+    vaga no pool (ex. httpx caindo pra HTTP/1.1 quando o ALPN não dá h2).
+    """
+    if backend == "httpx":
+        # HTTP/2: vários downloads multiplexados em poucas conexões TLS
+        return httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_inflight,
+                                max_keepalive_connections=max_inflight),
+            timeout=httpx.Timeout(60.0),
+            headers=HTTP_HEADERS,
+        )
+    connector = aiohttp.TCPConnector(
+        limit=max_inflight, limit_per_host=max_inflight, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, headers=HTTP_HEADERS)
+
+
+# erros de rede que valem outra tentativa (como o Retry do urllib3 faz)
+RETRYABLE_ERRORS = tuple(e for e in (
+    asyncio.TimeoutError,
+    aiohttp.ClientConnectionError if aiohttp is not None else None,
+    httpx.TransportError if httpx is not None else None,
+) if e is not None)
+
+
+@contextlib.asynccontextmanager
+async def _open_once(client, method: str, url: str, headers: dict | None, timeout: float):
+    if httpx is not None and isinstance(client, httpx.AsyncClient):
+        async with client.stream(method, url, headers=headers, timeout=timeout,
+                                 follow_redirects=True) as r:
+            yield r.status_code, r.headers, r.aiter_bytes
+    else:
+        # timeout por leitura (como o requests), não pro download inteiro
+        client_timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=30, sock_read=timeout)
+        async with client.request(method, url, headers=headers, allow_redirects=True,
+                                  timeout=client_timeout) as r:
+            yield r.status, r.headers, r.content.iter_chunked
+
+
+@contextlib.asynccontextmanager
+async def open_stream(client, method: str, url: str, headers: dict | None = None, timeout: float = 60):
+    """
+    Abre um request em streaming e entrega (status, headers, iter_chunks) no
+    mesmo formato pra aiohttp e httpx; iter_chunks(n) é um async iterator.
+    Refaz com backoff em erro de conexão ou status de RETRY_STATUS.
+    """
+    for attempt in range(RETRY_TOTAL + 1):
+        last = attempt == RETRY_TOTAL
+        stack = contextlib.AsyncExitStack()
+        try:
+            status, resp_headers, iter_chunks = await stack.enter_async_context(
+                _open_once(client, method, url, headers, timeout))
+        except RETRYABLE_ERRORS:
+            await stack.aclose()
+            if last:
+                raise
+        else:
+            if status not in RETRY_STATUS or last:
+                async with stack:
+                    yield status, resp_headers, iter_chunks
+                return
+            await stack.aclose()
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+async def parse_work_page_for_pdf_async(client, work_url: str) -> str | None:
+    async with open_stream(client, "GET", work_url) as (status, _, iter_chunks):
+        if status != 200:
+            return None
+        scanner = PdfScanner()
+        async for chunk in iter_chunks(64 * 1024):
+            pdf_url = scanner.feed(chunk)
+            if pdf_url:
+                return pdf_url
+            if len(scanner.buf) >= WORK_PAGE_MAX_BYTES:
+                break
+    return find_pdf_url_in_html(bytes(scanner.buf))
+
+
+async def probe_direct_pdf_async(client, pdf_url: str) -> bool:
+    async with open_stream(client, "HEAD", pdf_url, timeout=10) as (status, headers, _):
+        if status not in HEAD_BLOCKED:
+            return looks_like_pdf(status, headers)
+
+    async with open_stream(client, "GET", pdf_url, headers={"Range": "bytes=0-0"}, timeout=10) as (status, headers, _):
+        return looks_like_pdf(status, headers)
+
+
+async def download_pdf_async(client, pdf_url: str, out_path: Path, delay: float,
+                             validators: dict | None = None) -> bool:
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(out_path.suffix + ".part")
+
+    async with open_stream(client, "GET", pdf_url, headers=validators, timeout=120) as (status, headers, iter_chunks):
+        if status == 304:
+            return False
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status} em {pdf_url}")
+        # escrita síncrona: chunks grandes vão pro page cache, não vale um aiofiles
+        with open(tmp, "wb") as f:
+            async for chunk in iter_chunks(1024 * 1024):
+                f.write(chunk)
+
+    finish_part_file(tmp, out_path)
+    write_meta(out_path, pdf_url, headers)
+    return True
+
+
+async def job_download_async(client, work_url: str, wid: str, file_path: Path, delay: float) -> tuple[str, str, str, str, str]:
+    """
+    Mesmo fluxo/retorno de job_download.
+    """
+    meta = read_meta(file_path) if file_path.exists() else None
+    if meta and meta.get("url") and conditional_headers(meta):
+        try:
+            if await download_pdf_async(client, meta["url"], file_path, delay=delay,
+                                        validators=conditional_headers(meta)):
+                return (work_url, wid, meta["url"], str(file_path), "downloaded_updated")
+            return (work_url, wid, meta["url"], str(file_path), "exists")
+        except Exception:
+            pass
+
+    direct_pdf = f"https://static.even3.com/anais/{wid}.pdf" if wid else ""
+    if direct_pdf:
+        try:
+            if await probe_direct_pdf_async(client, direct_pdf):
+                await download_pdf_async(client, direct_pdf, file_path, delay=delay)
+                return (work_url, wid, direct_pdf, str(file_path), "downloaded_direct")
+        except Exception:
+            pass
+
+    try:
+        pdf_url = await parse_work_page_for_pdf_async(client, work_url)
+    except Exception:
+        return (work_url, wid, "", "", "error")
+    if not pdf_url:
+        return (work_url, wid, "", "", "no_pdf")
+
+    try:
+        await download_pdf_async(client, pdf_url, file_path, delay=delay)
+        return (work_url, wid, pdf_url, str(file_path), "downloaded_fallback")
+    except Exception:
+        return (work_url, wid, pdf_url, "", "error")
+
+
+async def download_all_async(backend: str, jobs: list[tuple[str, str, Path]], max_inflight: int, limit_fn,
+                             delay: float, on_result, is_running) -> None:
+    """
+    Roda todos os downloads num único event loop, com no máximo limit_fn()
+    tasks em voo (nunca acima de max_inflight); on_result recebe cada tupla
+    assim que fica pronta.
+    """
+    async with make_async_client(backend, max_inflight) as client:
+        pending = iter(jobs)
+        inflight = set()
+        try:
+            exhausted = False
+            while is_running():
+                while not exhausted and len(inflight) < limit_fn():
+                    nxt = next(pending, None)
+                    if nxt is None:
+                        exhausted = True
+                        break
+                    inflight.add(asyncio.create_task(
+                        job_download_async(client, *nxt, delay)))
+                if not inflight:
+                    break
+                done, inflight = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if not is_running():
+                        break
+                    on_result(t.result())
+        finally:
+            for t in inflight:
+                t.cancel()
+            await asyncio.gather(*inflight, return_exceptions=True)
+
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -280,9 +920,26 @@ class App(tk.Tk):
             value=str((Path.cwd() / "even3_downloads").resolve()))
         # <<< aumenta aqui se quiser (8~16 costuma ser bom)
         self.workers_var = tk.IntVar(value=10)
+        self.auto_var = tk.BooleanVar(value=False)  # calibra workers sozinho
         self.delay_var = tk.DoubleVar(value=0.0)   # <<< 0.0 = mais rápido
+        self.backend_var = tk.StringVar(value=BACKENDS[0])
+        # coleta via navegador só se o HTML direto não funcionar pro anais
+        self.browser_var = tk.BooleanVar(value=False)
+        # PDFs já baixados: conferir no servidor (ETag/Last-Modified) em vez de pular
+        self.revalidate_var = tk.BooleanVar(value=False)
 
         self.running = False
+        # progresso escrito pela thread de trabalho e desenhado a ~30 Hz
+        self._progress_state = {"value": 0, "status": "Pronto."}
+        self._progress_job = None
+        # Playwright (sync) só funciona na thread que o iniciou: o browser vive
+        # numa thread dedicada (daemon, não segura o fechamento do app) e é
+        # reaproveitado entre execuções
+        self._pw = None
+        self._browser = None
+        self._pw_tasks = queue.Queue()
+        threading.Thread(target=self._pw_loop,
+                         name="playwright", daemon=True).start()
         self._build_ui()
 
     def _build_ui(self):
@@ -306,13 +963,31 @@ class App(tk.Tk):
         perf.grid(row=4, column=0, columnspan=3, sticky="ew", pady=(0, 10))
         ttk.Label(perf, text="Workers (paralelo):").grid(
             row=0, column=0, sticky="w")
-        ttk.Spinbox(perf, from_=1, to=32, textvariable=self.workers_var, width=6).grid(
-            row=0, column=1, sticky="w", padx=(6, 14))
+        self.workers_spin = ttk.Spinbox(
+            perf, from_=1, to=32, textvariable=self.workers_var, width=6)
+        self.workers_spin.grid(row=0, column=1, sticky="w", padx=(6, 14))
+        auto_frm = ttk.Frame(perf)
+        auto_frm.grid(row=1, column=0, columnspan=2, sticky="w", pady=(4, 0))
+        ttk.Checkbutton(auto_frm, text="Auto", variable=self.auto_var,
+                        command=self._on_auto_toggle).pack(side="left")
+        ttk.Button(auto_frm, text="Recalibrar",
+                   command=self.reset_tuning).pack(side="left", padx=(6, 0))
         ttk.Label(perf, text="Delay por request (s):").grid(
             row=0, column=2, sticky="w")
         ttk.Spinbox(perf, from_=0.0, to=2.0, increment=0.05, textvariable=self.delay_var, width=6).grid(
-            row=0, column=3, sticky="w", padx=(6, 0))
-        perf.columnconfigure(4, weight=1)
+            row=0, column=3, sticky="w", padx=(6, 14))
+        ttk.Label(perf, text="Backend:").grid(
+            row=1, column=2, sticky="w", pady=(4, 0))
+        ttk.Combobox(perf, values=BACKENDS, textvariable=self.backend_var,
+                     state="readonly", width=9).grid(
+            row=1, column=3, sticky="w", padx=(6, 14), pady=(4, 0))
+        ttk.Checkbutton(perf, text="Coletar com navegador (Playwright)",
+                        variable=self.browser_var).grid(
+            row=0, column=4, sticky="w")
+        ttk.Checkbutton(perf, text="Revalidar já baixados",
+                        variable=self.revalidate_var).grid(
+            row=1, column=4, sticky="w", pady=(4, 0))
+        perf.columnconfigure(5, weight=1)
 
         self.btn_start = ttk.Button(
             frm, text="Baixar PDFs", command=self.start)
@@ -349,7 +1024,92 @@ class App(tk.Tk):
         self.after(0, _append)
 
     def set_status(self, msg: str):
-        self.after(0, lambda: self.status_var.set(msg))
+        self._progress_state["status"] = msg
+
+    def _apply_progress(self):
+        self.pbar.configure(value=self._progress_state["value"])
+        self.status_var.set(self._progress_state["status"])
+
+    def _flush_progress(self):
+        self._apply_progress()
+        self._progress_job = self.after(33, self._flush_progress)
+
+    def _stop_progress(self):
+        if self._progress_job is not None:
+            self.after_cancel(self._progress_job)
+            self._progress_job = None
+        self._apply_progress()
+
+    def _on_auto_toggle(self):
+        # no modo Auto o valor do spinbox é ignorado
+        self.workers_spin.configure(
+            state="disabled" if self.auto_var.get() else "normal")
+
+    def reset_tuning(self):
+        forget_tuned_workers()
+        self.log_line("Auto: calibração apagada, recalibra na próxima execução.")
+
+    def _pw_loop(self):
+        while True:
+            fn, fut = self._pw_tasks.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def _pw_call(self, fn) -> Future:
+        fut = Future()
+        self._pw_tasks.put((fn, fut))
+        return fut
+
+    def _ensure_browser(self):
+        # roda sempre na thread do _pw_loop
+        if self._browser is not None and not self._browser.is_connected():
+            # Chromium caiu/crashou: descarta e abre outro
+            self.log_line("Navegador desconectado, reabrindo…")
+            self._close_browser()
+        if self._browser is None:
+            args = ["--disable-dev-shm-usage"]
+            # sandbox do Chromium não sobe como root (containers); fora isso, fica ligado
+            if hasattr(os, "geteuid") and os.geteuid() == 0:
+                args.append("--no-sandbox")
+            self._pw = sync_playwright().start()
+            self._browser = self._pw.chromium.launch(headless=True, args=args)
+        return self._browser
+
+    def _close_browser(self):
+        # tolera browser já morto: o importante é zerar e parar o driver
+        browser, self._browser = self._browser, None
+        pw, self._pw = self._pw, None
+        if browser is not None:
+            try:
+                browser.close()
+            except Exception:
+                pass
+        if pw is not None:
+            try:
+                pw.stop()
+            except Exception:
+                pass
+
+    def collect_with_browser(self, anais_url: str, slug: str, progress_fn) -> list[str]:
+        def run():
+            return collect_work_urls_with_playwright(
+                self._ensure_browser(), anais_url, slug, self.log_line, progress_fn,
+                lambda: self.running)
+        return self._pw_call(run).result()
+
+    def destroy(self):
+        # interrompe uma coleta em andamento; se ainda assim não fechar a
+        # tempo, a thread daemon morre junto com o processo
+        self.running = False
+        try:
+            self._pw_call(self._close_browser).result(timeout=5)
+        except Exception:
+            pass
+        super().destroy()
 
     def stop(self):
         self.running = False
@@ -363,7 +1123,11 @@ class App(tk.Tk):
         anais_url = normalize_anais_url(self.url_var.get())
         out_dir = Path(self.out_var.get()).expanduser().resolve()
         workers = int(self.workers_var.get())
+        auto = bool(self.auto_var.get())
         delay = float(self.delay_var.get())
+        backend = self.backend_var.get()
+        use_browser = bool(self.browser_var.get())
+        revalidate = bool(self.revalidate_var.get())
 
         if not anais_url:
             messagebox.showerror("Erro", "Cole o link do anais.")
@@ -382,27 +1146,52 @@ class App(tk.Tk):
         self.btn_stop.configure(state="normal")
         self.pbar["value"] = 0
         self.pbar["maximum"] = 100
+        self._progress_state.update(value=0, status="Iniciando…")
+        self._flush_progress()
 
         t = threading.Thread(
             target=self.worker,
-            args=(anais_url, slug, out_dir, workers, delay),
+            args=(anais_url, slug, out_dir, workers, auto,
+                  delay, backend, use_browser, revalidate),
             daemon=True
         )
         t.start()
 
-    def worker(self, anais_url: str, slug: str, out_dir: Path, workers: int, delay: float):
+    def worker(self, anais_url: str, slug: str, out_dir: Path, workers: int, auto: bool,
+               delay: float, backend: str, use_browser: bool, revalidate: bool):
         try:
             self.log_line(f"Anais: {anais_url}")
             self.log_line(f"Slug: {slug}")
             self.log_line(f"Saída: {out_dir}")
-            self.log_line(f"Workers: {workers} | Delay: {delay}s")
+            tuner = None
+            if auto:
+                cached = load_tuned_workers()
+                if cached:
+                    workers = cached
+                    self.log_line(f"Auto: usando {workers} workers calibrados antes")
+                else:
+                    tuner = ConcurrencyTuner()
+                    self.log_line("Auto: calibrando workers nos primeiros downloads…")
+
+            self.log_line(f"Workers: {'auto' if tuner else workers} | Delay: {delay}s | "
+                          f"Backend: {backend}")
 
             def progress_text(msg: str):
                 self.set_status(msg)
 
-            # 1) coletar URLs de trabalhos (dinâmico)
-            work_urls = collect_work_urls_with_playwright(
-                anais_url, slug, self.log_line, progress_text)
+            session = make_session(TUNE_MAX_INFLIGHT if tuner else workers)
+
+            # 1) coletar URLs de trabalhos (HTML direto; navegador como fallback)
+            work_urls = []
+            if not use_browser:
+                work_urls = collect_work_urls_http(
+                    session, anais_url, slug, progress_text)
+                if not work_urls:
+                    self.log_line(
+                        "HTML direto sem paginação (ou com erro), tentando com navegador…")
+            if not work_urls:
+                work_urls = self.collect_with_browser(
+                    anais_url, slug, progress_text)
             if not work_urls:
                 raise RuntimeError(
                     "Não encontrei links de trabalhos. Talvez o anais esteja com layout diferente.")
@@ -415,43 +1204,78 @@ class App(tk.Tk):
             self.set_status("Baixando PDFs em paralelo…")
 
             self.after(0, lambda: self.pbar.config(maximum=total))
-            self.after(0, lambda: self.pbar.config(value=0))
 
             manifest = out_dir / "manifest.csv"
             ok = 0
             no_pdf = 0
             err = 0
-
-            pool_size = max(8, workers * 2)
+            done_count = 0
 
             with open(manifest, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
+                w = csv.writer(f, lineterminator="\n")
                 w.writerow(
                     ["work_url", "work_id", "pdf_url", "file_path", "status"])
+                rows: list[tuple[str, str, str, str, str]] = []
+
+                def flush_rows():
+                    w.writerows(rows)
+                    f.flush()
+                    rows.clear()
+
+                def handle_result(result: tuple[str, str, str, str, str]):
+                    nonlocal ok, no_pdf, err, done_count
+                    rows.append(result)
+                    if len(rows) >= MANIFEST_BATCH:
+                        flush_rows()
+                    status = result[4]
+                    if tuner and status.startswith("downloaded"):
+                        tuner.add_bytes(os.path.getsize(result[3]))
+
+                    done_count += 1
+                    self._progress_state["value"] = done_count
+                    self.set_status(f"Concluídos {done_count}/{total}…")
+
+                    if status.startswith("downloaded") or status == "exists":
+                        ok += 1
+                    elif status == "no_pdf":
+                        no_pdf += 1
+                    else:
+                        err += 1
+
+                def limit() -> int:
+                    return tuner.limit if tuner else workers
 
-                with ThreadPoolExecutor(max_workers=workers) as ex:
-                    futures = [
-                        ex.submit(job_download, u, out_dir, pool_size, delay) for u in work_urls]
-
-                    done_count = 0
-                    for fut in as_completed(futures):
-                        if not self.running:
-                            break
-
-                        work_url, wid, pdf_url, file_path, status = fut.result()
-                        w.writerow([work_url, wid, pdf_url, file_path, status])
-
-                        done_count += 1
-                        self.after(
-                            0, lambda v=done_count: self.pbar.config(value=v))
-                        self.set_status(f"Concluídos {done_count}/{total}…")
-
-                        if status.startswith("downloaded") or status == "exists":
-                            ok += 1
-                        elif status == "no_pdf":
-                            no_pdf += 1
+                try:
+                    # já baixados não passam pelo executor
+                    jobs, skipped = plan_jobs(work_urls, out_dir, revalidate)
+                    for result in skipped:
+                        handle_result(result)
+                    if skipped:
+                        self.log_line(
+                            f"Já existentes (pulados): {len(skipped)}")
+
+                    if tuner:
+                        tuner.start()
+                    if backend != "threads":
+                        max_inflight = TUNE_MAX_INFLIGHT if tuner else workers
+                        asyncio.run(download_all_async(
+                            backend, jobs, max_inflight, limit, delay, handle_result, lambda: self.running))
+                    else:
+                        if tuner:
+                            max_threads, window = TUNE_MAX_INFLIGHT, limit
                         else:
-                            err += 1
+                            # `workers` threads ocupadas + fila curta de reserva
+                            max_threads, window = workers, lambda: workers * 4
+                        download_all_threaded(
+                            session, jobs, max_threads, window, delay, handle_result, lambda: self.running)
+                finally:
+                    flush_rows()
+
+            if tuner and tuner.converged:
+                save_tuned_workers(tuner.limit)
+                self.log_line(f"Auto: convergiu em {tuner.limit} workers")
+            elif tuner:
+                self.log_line("Auto: calibração incompleta, nada salvo")
 
             if self.running:
                 self.set_status(
@@ -466,6 +1290,7 @@ class App(tk.Tk):
             self.set_status("Erro.")
         finally:
             self.running = False
+            self.after(0, self._stop_progress)
             self.after(0, lambda: self.btn_start.config(state="normal"))
             self.after(0, lambda: self.btn_stop.config(state="disabled"))
 